@@ -1,18 +1,46 @@
 import argparse
+import concurrent.futures
 import dataclasses
+import json
+import os
 import pathlib
 import re
 import typing
 
-import ruamel.yaml
-
-
-def remove_set_commands(content: str) -> str:
-    return re.sub(r"^\s*(set -[eux])\n\s*", "", content, flags=re.MULTILINE)
-
-
-def remove_shebang(content: str) -> str:
-    return re.sub(r"^\s*#!.*\n\s*", "", content)
+# Leading shebang plus any "set -[eux]" lines. A set line directly after the
+# shebang has no line start of its own once the shebang's trailing whitespace
+# is consumed, so the first branch swallows one of those as well.
+_PREAMBLE_RE = re.compile(
+    r"\A\s*#!.*\n\s*(?:set -[eux]\n\s*)?|^\s*set -[eux]\n\s*",
+    re.MULTILINE,
+)
+_SENSITIVE_RE = re.compile(rb"\bset\s+\+x\b")
+_ONLINUX_RE = re.compile(r"\bon-linux\b")
+_INSTALL_RE = re.compile(r"\b(apt|pip3?|yum|brew|curl)\b")
+
+# Matched word -> (priority, install method). Lower priority wins when a
+# script mentions more than one install method.
+_INSTALL_METHODS = {
+    "apt": (0, "apt"),
+    "pip": (1, "pip"),
+    "pip3": (1, "pip"),
+    "yum": (2, "yum"),
+    "brew": (3, "homebrew"),
+    "curl": (4, "curl"),
+}
+
+# Bump when extraction logic changes so stale cache entries are discarded.
+_CACHE_VERSION = 1
+
+# Scalars that can be emitted unquoted without being read back as anything
+# other than a string (numbers, booleans and null all fail this or are
+# listed in _YAML_RESERVED).
+_YAML_PLAIN_RE = re.compile(r"[^\W\d][\w.-]*\Z")
+_YAML_RESERVED = {"y", "n", "yes", "no", "on", "off", "true", "false", "null"}
+
+
+def remove_preamble(content: str) -> str:
+    return _PREAMBLE_RE.sub("", content)
 
 
 class ScriptContentProcessor:
@@ -25,20 +53,104 @@ class ScriptContentProcessor:
         return content
 
 
+def _yaml_double_quoted(value: str) -> str:
+    chars = []
+    for char in value:
+        if char in '"\\':
+            chars.append("\\" + char)
+        elif char.isprintable():
+            chars.append(char)
+        elif ord(char) <= 0xFF:
+            chars.append(f"\\x{ord(char):02x}")
+        elif ord(char) <= 0xFFFF:
+            chars.append(f"\\u{ord(char):04x}")
+        else:
+            chars.append(f"\\U{ord(char):08x}")
+    return '"' + "".join(chars) + '"'
+
+
+def _yaml_scalar(value: str) -> str:
+    if _YAML_PLAIN_RE.match(value) and value.lower() not in _YAML_RESERVED:
+        return value
+    if value.isprintable():
+        return "'" + value.replace("'", "''") + "'"
+    return _yaml_double_quoted(value)
+
+
+def _yaml_block_literal(value: str, indent: int) -> str:
+    # Empty, whitespace-only or non-printable content can't be represented
+    # reliably as a block literal; fall back to a double-quoted scalar.
+    if not value.strip(" \n") or not all(
+        line.replace("\t", "").isprintable() for line in value.split("\n")
+    ):
+        return _yaml_double_quoted(value) + "\n"
+
+    header = "|"
+    if value[0] in " \n":
+        # Explicit indentation (relative to the parent mapping) so leading
+        # spaces or blank lines aren't taken as part of the indent.
+        header += "2"
+    if not value.endswith("\n"):
+        header += "-"
+    elif value.endswith("\n\n"):
+        header += "+"
+
+    lines = value.split("\n")
+    if value.endswith("\n"):
+        lines.pop()
+    prefix = " " * indent
+    body = "".join(f"{prefix}{line}\n" if line else "\n" for line in lines)
+    return f"{header}\n{body}"
+
+
+def dump_apps(
+    apps: typing.Iterable[typing.Dict[str, typing.Any]], f: typing.TextIO
+) -> None:
+    # Hand-written emitter for the fixed scripts.yaml schema; matches the
+    # layout ruamel.yaml produced with indent(mapping=2, sequence=4, offset=2).
+    # apps is consumed once, so a dict view or generator can be streamed in.
+    wrote_any = False
+    for app in apps:
+        if not wrote_any:
+            f.write("apps:\n")
+            wrote_any = True
+        f.write(f"  - name: {_yaml_scalar(app['name'])}\n")
+        if not app["install_methods"]:
+            f.write("    install_methods: []\n")
+            continue
+        f.write("    install_methods:\n")
+        for install_method in app["install_methods"]:
+            f.write(f"      - type: {_yaml_scalar(install_method['type'])}\n")
+            f.write(
+                f"        script_type: {_yaml_scalar(install_method['script_type'])}\n"
+            )
+            f.write(
+                f"        script: {_yaml_block_literal(install_method['script'], 10)}"
+            )
+    if not wrote_any:
+        f.write("apps: []\n")
+
+
 class ScriptPathCollector:
     def collect(
         self, basedir: pathlib.Path, *extensions: str
     ) -> typing.List[pathlib.Path]:
-        files = []
-        for ext in extensions:
-            files.extend(basedir.glob(f"*{ext}"))
-        return files
+        # Single directory pass; results stay grouped in extension order.
+        files_by_ext: typing.Dict[str, typing.List[pathlib.Path]] = {
+            ext: [] for ext in extensions
+        }
+        with os.scandir(basedir) as entries:
+            for entry in entries:
+                for ext in extensions:
+                    if entry.name.endswith(ext):
+                        files_by_ext[ext].append(pathlib.Path(entry.path))
+        return [path for files in files_by_ext.values() for path in files]
 
 
-def detect_script_type(script_path: pathlib.Path) -> str:
-    if script_path.suffix == ".sh":
+def detect_script_type(suffix: str) -> str:
+    if suffix == ".sh":
         return "bash"
-    elif script_path.suffix == ".ps1":
+    elif suffix == ".ps1":
         return "powershell"
     else:
         # If neither .sh nor .ps1, we need to parse the script content to determine the type
@@ -47,7 +159,7 @@ def detect_script_type(script_path: pathlib.Path) -> str:
         return "bash"
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class ScriptData:
     app_name: str
     install_method: str
@@ -59,7 +171,7 @@ class ScriptDataExtractor:
     def __init__(
         self,
         content_processor: ScriptContentProcessor,
-        script_type_detector: typing.Callable[[pathlib.Path], str],
+        script_type_detector: typing.Callable[[str], str],
     ):
         self.content_processor = content_processor
         self.script_type_detector = script_type_detector
@@ -67,47 +179,110 @@ class ScriptDataExtractor:
     def extract(
         self,
         script_path: pathlib.Path,
-        grouping_fn: typing.Callable[[pathlib.Path], str],
+        grouping_fn: typing.Callable[[str, str], str],
     ) -> ScriptData:
-        script_name_parts = script_path.stem.split("-", 1)
-        app_name = (
-            script_name_parts[1] if len(script_name_parts) > 1 else script_path.stem
-        )
-        install_method = grouping_fn(script_path)
+        name = script_path.name
+        stem = script_path.stem
+        suffix = script_path.suffix
+        _, sep, rest = stem.partition("-")
+        app_name = rest if sep else stem
         script_content = script_path.read_text()
+        install_method = grouping_fn(name, script_content)
         script_content = self.content_processor.process(script_content)
-        script_type = self.script_type_detector(script_path)
+        script_type = self.script_type_detector(suffix)
         return ScriptData(app_name, install_method, script_type, script_content)
 
 
+class ScriptDataCache:
+    # Sidecar JSON file mapping script path -> extracted ScriptData, reused
+    # while the script's mtime and size are unchanged.
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self.entries: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+        self.updated_entries: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+        self.grouping_fn_name = ""
+
+    def load(self, grouping_fn: typing.Callable[[str, str], str]) -> None:
+        self.grouping_fn_name = grouping_fn.__qualname__
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        if (
+            isinstance(data, dict)
+            and data.get("version") == _CACHE_VERSION
+            and data.get("grouping_fn") == self.grouping_fn_name
+        ):
+            self.entries = data["scripts"]
+
+    def get(
+        self, script_path: pathlib.Path, stat: os.stat_result
+    ) -> typing.Optional[ScriptData]:
+        entry = self.entries.get(str(script_path))
+        if entry is None or entry["mtime_ns"] != stat.st_mtime_ns:
+            return None
+        if entry["size"] != stat.st_size:
+            return None
+        return ScriptData(**entry["data"])
+
+    def put(
+        self, script_path: pathlib.Path, stat: os.stat_result, script_data: ScriptData
+    ) -> None:
+        self.updated_entries[str(script_path)] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "data": dataclasses.asdict(script_data),
+        }
+
+    def save(self) -> None:
+        # Only scripts seen in this run are kept, so removed scripts drop out.
+        data = {
+            "version": _CACHE_VERSION,
+            "grouping_fn": self.grouping_fn_name,
+            "scripts": self.updated_entries,
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, self.path)
+
+
 class ScriptProcessor:
     def __init__(
         self,
         outfile: str,
         script_data_extractor: ScriptDataExtractor,
         content_processor: ScriptContentProcessor,
+        cache: typing.Optional[ScriptDataCache] = None,
     ):
         self.outfile = pathlib.Path(outfile)
         self.script_data_extractor = script_data_extractor
         self.content_processor = content_processor
+        self.cache = cache
         self.errors_and_warnings: typing.List[str] = []
         self.processed_script_count: int = 0
 
+    def extract_script_data(
+        self,
+        script_path: pathlib.Path,
+        grouping_fn: typing.Callable[[str, str], str],
+    ) -> ScriptData:
+        if self.cache is None:
+            return self.script_data_extractor.extract(script_path, grouping_fn)
+
+        stat = script_path.stat()
+        script_data = self.cache.get(script_path, stat)
+        if script_data is None:
+            script_data = self.script_data_extractor.extract(script_path, grouping_fn)
+        self.cache.put(script_path, stat, script_data)
+        return script_data
+
     def process_script(
         self,
         script_path: pathlib.Path,
-        grouping_fn: typing.Callable[[pathlib.Path], str],
+        script_data: ScriptData,
         apps_data: typing.Dict[str, typing.Dict[str, typing.Any]],
     ) -> None:
-        script_data = self.script_data_extractor.extract(script_path, grouping_fn)
-        if script_data.app_name in apps_data:
-            self.errors_and_warnings.append(
-                f"Warning: Duplicate app name found - {script_data.app_name}\n"
-                f"Skipping script: {script_path}"
-            )
-            return
-
-        apps_data[script_data.app_name] = {
+        app_data = {
             "name": script_data.app_name,
             "install_methods": [
                 {
@@ -117,28 +292,40 @@ class ScriptProcessor:
                 }
             ],
         }
+        if apps_data.setdefault(script_data.app_name, app_data) is not app_data:
+            self.errors_and_warnings.append(
+                f"Warning: Duplicate app name found - {script_data.app_name}\n"
+                f"Skipping script: {script_path}"
+            )
+            return
+
         self.processed_script_count += 1
 
     def process_scripts(
         self,
         script_paths: typing.List[pathlib.Path],
-        grouping_fn: typing.Callable[[pathlib.Path], str],
+        grouping_fn: typing.Callable[[str, str], str],
     ) -> None:
-        apps_data = {}
-        for script_path in script_paths:
-            self.process_script(script_path, grouping_fn, apps_data)
-
-        apps = list(apps_data.values())
-        yaml = ruamel.yaml.YAML()
-        yaml.indent(mapping=2, sequence=4, offset=2)
+        # Reading and scanning scripts is independent per file and mostly I/O,
+        # so it runs on a thread pool; results are merged in input order so
+        # duplicate detection stays deterministic.
+        if self.cache is not None:
+            self.cache.load(grouping_fn)
+
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            extracted = executor.map(
+                lambda script_path: self.extract_script_data(script_path, grouping_fn),
+                script_paths,
+            )
+            apps_data = {}
+            for script_path, script_data in zip(script_paths, extracted):
+                self.process_script(script_path, script_data, apps_data)
 
         with open(self.outfile, "w") as f:
-            yaml.dump(
-                {
-                    "apps": apps,
-                },
-                f,
-            )
+            dump_apps(apps_data.values(), f)
+
+        if self.cache is not None:
+            self.cache.save()
 
         if self.errors_and_warnings:
             print("Errors and Warnings:")
@@ -150,8 +337,10 @@ class ScriptProcessor:
 
 
 def check_sensitive_info(script_path: pathlib.Path) -> bool:
-    content = script_path.read_text()
-    return bool(re.search(r"\bset\s+\+x\b", content))
+    # Only a yes/no answer is needed here, so scan the raw bytes and skip
+    # decoding the file.
+    content = script_path.read_bytes()
+    return bool(_SENSITIVE_RE.search(content))
 
 
 def parse_args() -> argparse.Namespace:
@@ -171,23 +360,19 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def group_by_install_method(script_path: pathlib.Path) -> str:
-    content = script_path.read_text()
-
-    if re.search(r"\bon-linux\b", script_path.name):
+def group_by_install_method(script_name: str, content: str) -> str:
+    if _ONLINUX_RE.search(script_name):
         return "any"
-    if re.search(r"\bapt\b", content):
-        return "apt"
-    if re.search(r"\bpip3?\b", content):
-        return "pip"
-    if re.search(r"\byum\b", content):
-        return "yum"
-    if re.search(r"\bbrew\b", content):
-        return "homebrew"
-    if re.search(r"\bcurl\b", content):
-        return "curl"
-    else:
-        return "other"
+
+    best = "other"
+    best_priority = len(_INSTALL_METHODS)
+    for match in _INSTALL_RE.finditer(content):
+        priority, install_method = _INSTALL_METHODS[match.group(1)]
+        if priority < best_priority:
+            best, best_priority = install_method, priority
+            if priority == 0:
+                break
+    return best
 
 
 def process_sensitive_info(script_paths: typing.List[pathlib.Path]) -> None:
@@ -211,14 +396,15 @@ def main() -> None:
         process_sensitive_info(script_paths)
 
     content_processor = ScriptContentProcessor(
-        remove_shebang,
-        remove_set_commands,
-        ruamel.yaml.scalarstring.PreservedScalarString,
+        remove_preamble,
     )
 
     script_data_extractor = ScriptDataExtractor(content_processor, detect_script_type)
     script_processor = ScriptProcessor(
-        "scripts.yaml", script_data_extractor, content_processor
+        "scripts.yaml",
+        script_data_extractor,
+        content_processor,
+        cache=ScriptDataCache(pathlib.Path("scripts.yaml.cache.json")),
     )
 
     script_processor.process_scripts(